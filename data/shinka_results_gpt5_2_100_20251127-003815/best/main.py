@@ -10,6 +10,21 @@ Public API:
 """
 
 from collections import OrderedDict
+from itertools import islice
+
+import numpy as np
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_GOLDEN = 0x9e3779b97f4a7c15
+
+
+def _fmix64(h: int) -> int:
+    h ^= h >> 33
+    h = (h * 0xff51afd7ed558ccd) & _MASK64
+    h ^= h >> 33
+    h = (h * 0xc4ceb9fe1a85ec53) & _MASK64
+    h ^= h >> 33
+    return h
 
 
 class _CmSketch:
@@ -18,61 +33,136 @@ class _CmSketch:
     - d hash functions, width w (power-of-two).
     - Periodic right-shift halves counters to forget stale history.
     - Conservative updates to curb overestimation.
+
+    Counters live in one flat d*w bytearray: 1 byte per cell instead of a
+    Python int per cell (~28x smaller), with scalar reads/writes as cheap
+    as list indexing. Batch operations (aging) go through a writable
+    numpy uint8 view over the same buffer.
     """
-    __slots__ = ("d", "w", "tables", "mask", "ops", "age_period", "seeds")
+    __slots__ = ("d", "w", "tables", "tables_np", "mask",
+                 "age_period", "age_countdown", "_last_hash", "_last_offs")
 
     def __init__(self, width_power=12, d=3):
         self.d = int(max(1, d))
         w = 1 << int(max(8, width_power))  # min 256
         self.w = w
         self.mask = w - 1
-        self.tables = [[0] * w for _ in range(self.d)]
-        self.ops = 0
+        self.tables = bytearray(self.d * w)
+        self.tables_np = np.frombuffer(self.tables, dtype=np.uint8)
         self.age_period = max(1024, w)
-        self.seeds = (0x9e3779b1, 0x85ebca77, 0xc2b2ae3d, 0x27d4eb2f)
-
-    def _hash(self, key_hash: int, i: int) -> int:
-        h = key_hash ^ self.seeds[i % len(self.seeds)]
-        h ^= (h >> 33) & 0xFFFFFFFFFFFFFFFF
-        h *= 0xff51afd7ed558ccd
-        h &= 0xFFFFFFFFFFFFFFFF
-        h ^= (h >> 33)
-        h *= 0xc4ceb9fe1a85ec53
-        h &= 0xFFFFFFFFFFFFFFFF
-        h ^= (h >> 33)
-        return h & self.mask
+        self.age_countdown = self.age_period
+        # One-slot memo for the increment-then-estimate pattern on the
+        # same key within a single policy call.
+        self._last_hash = None
+        self._last_offs = None
+
+    def _offsets(self, key_hash: int) -> list:
+        if key_hash == self._last_hash:
+            return self._last_offs
+        # Kirsch-Mitzenmacher double hashing: two fmix64 runs per key
+        # derive every lane index, instead of one full fmix per lane.
+        h = key_hash & _MASK64
+        h1 = _fmix64(h)
+        h2 = _fmix64(h ^ _GOLDEN) | 1  # odd stride
+        w = self.w
+        mask = self.mask
+        offs = [i * w + ((h1 + i * h2) & mask) for i in range(self.d)]
+        self._last_hash = key_hash
+        self._last_offs = offs
+        return offs
 
     def _maybe_age(self):
-        self.ops += 1
-        if self.ops % self.age_period == 0:
-            for t in self.tables:
-                for i in range(self.w):
-                    t[i] >>= 1
+        # Countdown instead of ops % age_period: one decrement and compare
+        # per increment, no modulo.
+        self.age_countdown -= 1
+        if self.age_countdown <= 0:
+            self.tables_np >>= 1
+            self.age_countdown = self.age_period
 
     def increment(self, key: str, amount: int = 1):
+        self.increment_h(hash(key), amount)
+
+    def increment_h(self, key_hash: int, amount: int = 1):
         # Conservative update: increment only counters at the current minimum.
-        h = hash(key)
-        idxs = [self._hash(h, i) for i in range(self.d)]
-        vals = [self.tables[i][idxs[i]] for i in range(self.d)]
+        tables = self.tables
+        offs = self._offsets(key_hash)
+        vals = [tables[o] for o in offs]
         minv = min(vals) if vals else 0
-        for i in range(self.d):
-            if self.tables[i][idxs[i]] == minv:
-                v = self.tables[i][idxs[i]] + amount
-                if v > 255:
-                    v = 255
-                self.tables[i][idxs[i]] = v
+        if minv >= 255:
+            # All lanes saturated (hot key): nothing to write until aging
+            # halves the counters.
+            self._maybe_age()
+            return
+        nv = minv + amount
+        if nv > 255:
+            nv = 255
+        for o, v in zip(offs, vals):
+            if v == minv:
+                tables[o] = nv
         self._maybe_age()
 
+    def increment_and_estimate_h(self, key_hash: int, amount: int = 1) -> int:
+        """Fused conservative update + estimate: one offsets/gather pass.
+
+        Under conservative update the post-increment minimum is exactly
+        min(minv + amount, 255), so no second read is needed unless this
+        very op triggers an aging halving.
+        """
+        tables = self.tables
+        offs = self._offsets(key_hash)
+        vals = [tables[o] for o in offs]
+        minv = min(vals) if vals else 0
+        if minv < 255:
+            nv = minv + amount
+            if nv > 255:
+                nv = 255
+            for o, v in zip(offs, vals):
+                if v == minv:
+                    tables[o] = nv
+        else:
+            nv = 255
+        self.age_countdown -= 1
+        if self.age_countdown <= 0:
+            self.tables_np >>= 1
+            self.age_countdown = self.age_period
+            nv >>= 1
+        return nv
+
     def estimate(self, key: str) -> int:
-        h = hash(key)
-        est = 1 << 30
-        for i in range(self.d):
-            idx = self._hash(h, i)
-            v = self.tables[i][idx]
+        return self.estimate_h(hash(key))
+
+    def estimate_h(self, key_hash: int) -> int:
+        tables = self.tables
+        est = 256
+        for o in self._offsets(key_hash):
+            v = tables[o]
             if v < est:
                 est = v
         return est
 
+    def estimate_many(self, keys) -> list:
+        # Batch form used by the tail samplers: one pass with the table,
+        # width and mask held in locals instead of per-key method calls.
+        # Candidate batches are tiny (a handful of keys x d lanes), so a
+        # scalar loop over the bytearray beats numpy gather overhead.
+        tables = self.tables
+        w = self.w
+        mask = self.mask
+        d = self.d
+        ests = []
+        append = ests.append
+        for key in keys:
+            h = hash(key) & _MASK64
+            h1 = _fmix64(h)
+            h2 = _fmix64(h ^ _GOLDEN) | 1
+            est = 256
+            for i in range(d):
+                v = tables[i * w + ((h1 + i * h2) & mask)]
+                if v < est:
+                    est = v
+            append(est)
+        return ests
+
 
 class _SplitWinTLFU:
     """
@@ -90,7 +180,7 @@ class _SplitWinTLFU:
         "hits_w", "hits_main", "hits_w2",
         "prom_m2", "dem_m2",
         "last_tune_time", "tune_period",
-        "miss_streak", "scan_cooldown"
+        "_scan_state", "_scan_thr", "_targets_cache"
     )
 
     def __init__(self):
@@ -114,9 +204,13 @@ class _SplitWinTLFU:
         self.dem_m2 = 0
         self.last_tune_time = 0
         self.tune_period = 0
-        # Scan handling
-        self.miss_streak = 0
-        self.scan_cooldown = 0
+        # Scan handling: >0 = scan cooldown remaining, <0 = miss streak
+        # in progress (magnitude), 0 = idle.
+        self._scan_state = 0
+        self._scan_thr = 16
+        # Target sizes are recomputed eagerly whenever capacity or the
+        # adaptive fractions change, so _targets() is a plain read.
+        self._targets_cache = self._compute_targets()
 
     # ----- helpers -----
 
@@ -126,32 +220,35 @@ class _SplitWinTLFU:
             self.capacity = cap
             # sampling and sketch sizing w.r.t. capacity
             self._sample_k = max(4, min(12, (self.capacity // 8) or 4))
-            try:
-                target = max(512, self.capacity * 4)
-                wp = max(8, (target - 1).bit_length())
-                self.sketch = _CmSketch(width_power=wp, d=4)
-                self.sketch.age_period = max(512, min(16384, self.capacity * 8))
-            except Exception:
-                pass
+            target = max(512, self.capacity * 4)
+            wp = max(8, (target - 1).bit_length())
+            self.sketch = _CmSketch(width_power=wp, d=4)
+            self.sketch.age_period = max(512, min(16384, self.capacity * 8))
+            self.sketch.age_countdown = self.sketch.age_period
             self.tune_period = max(256, self.capacity * 4)
+            self._scan_thr = max(16, self.capacity // 2)
             self.last_tune_time = 0
+            self._targets_cache = self._compute_targets()
             return
         if self.capacity != cap:
             # External capacity change; reset segments to avoid desync.
             self.W1.clear(); self.W2.clear(); self.M1.clear(); self.M2.clear()
             self.capacity = cap
             self._sample_k = max(4, min(12, (self.capacity // 8) or 4))
-            try:
-                target = max(512, self.capacity * 4)
-                wp = max(8, (target - 1).bit_length())
-                self.sketch = _CmSketch(width_power=wp, d=4)
-                self.sketch.age_period = max(512, min(16384, self.capacity * 8))
-            except Exception:
-                pass
+            target = max(512, self.capacity * 4)
+            wp = max(8, (target - 1).bit_length())
+            self.sketch = _CmSketch(width_power=wp, d=4)
+            self.sketch.age_period = max(512, min(16384, self.capacity * 8))
+            self.sketch.age_countdown = self.sketch.age_period
             self.tune_period = max(256, self.capacity * 4)
+            self._scan_thr = max(16, self.capacity // 2)
             self.last_tune_time = 0
+            self._targets_cache = self._compute_targets()
 
     def _targets(self):
+        return self._targets_cache
+
+    def _compute_targets(self):
         cap = self.capacity or 1
         w_tgt = max(1, int(round(cap * self.win_frac)))
         w2_tgt = min(w_tgt, max(0, int(round(w_tgt * self.w2_frac))))
@@ -179,62 +276,90 @@ class _SplitWinTLFU:
                     self.M1[k] = None
 
     def _maybe_tune(self, now: int):
-        # Periodically adapt window and protection fractions.
-        if self.tune_period <= 0:
-            return
-        if (now - self.last_tune_time) >= self.tune_period:
-            # Adapt window size based on relative hit share
-            if self.hits_w > self.hits_main * 1.15:
-                self.win_frac = min(0.55, self.win_frac + 0.05)
-            elif self.hits_main > self.hits_w * 1.15:
-                self.win_frac = max(0.08, self.win_frac - 0.04)
-
-            # Adapt W2 share inside window
-            if self.hits_w2 > (self.hits_w + 1) * 0.7:
-                self.w2_frac = min(0.6, self.w2_frac + 0.05)
-            elif self.hits_w > self.hits_w2 * 1.6:
-                self.w2_frac = max(0.2, self.w2_frac - 0.05)
-
-            # Adapt main protected fraction based on promotion/demotion balance
-            if self.prom_m2 > self.dem_m2 * 1.2 and self.hits_main > self.hits_w:
-                self.prot_frac = min(0.9, self.prot_frac + 0.05)
-            elif self.dem_m2 > self.prom_m2 * 1.2:
-                self.prot_frac = max(0.6, self.prot_frac - 0.05)
-
-            # Decay stats
-            self.hits_w >>= 1
-            self.hits_w2 >>= 1
-            self.hits_main >>= 1
-            self.prom_m2 >>= 1
-            self.dem_m2 >>= 1
-            self.last_tune_time = now
+        # Adapt window and protection fractions. Callers gate this call on
+        # the tune period having elapsed, so the check is not repeated here.
+        # Adapt window size based on relative hit share
+        if self.hits_w > self.hits_main * 1.15:
+            self.win_frac = min(0.55, self.win_frac + 0.05)
+        elif self.hits_main > self.hits_w * 1.15:
+            self.win_frac = max(0.08, self.win_frac - 0.04)
+
+        # Adapt W2 share inside window
+        if self.hits_w2 > (self.hits_w + 1) * 0.7:
+            self.w2_frac = min(0.6, self.w2_frac + 0.05)
+        elif self.hits_w > self.hits_w2 * 1.6:
+            self.w2_frac = max(0.2, self.w2_frac - 0.05)
+
+        # Adapt main protected fraction based on promotion/demotion balance
+        if self.prom_m2 > self.dem_m2 * 1.2 and self.hits_main > self.hits_w:
+            self.prot_frac = min(0.9, self.prot_frac + 0.05)
+        elif self.dem_m2 > self.prom_m2 * 1.2:
+            self.prot_frac = max(0.6, self.prot_frac - 0.05)
+
+        # Decay stats
+        self.hits_w >>= 1
+        self.hits_w2 >>= 1
+        self.hits_main >>= 1
+        self.prom_m2 >>= 1
+        self.dem_m2 >>= 1
+        self.last_tune_time = now
+        self._targets_cache = self._compute_targets()
 
     def _lru(self, od: OrderedDict):
         return next(iter(od)) if od else None
 
-    def _touch(self, od: OrderedDict, key: str):
-        od[key] = None
+    def _touch_existing(self, od: OrderedDict, key: str):
+        # Key is known present: re-linking is all that is needed.
         od.move_to_end(key)
 
-    def _sample_lru_min_freq(self, od: OrderedDict) -> str:
+    def _touch_insert(self, od: OrderedDict, key: str):
+        # Key is known absent (just popped from another segment):
+        # OrderedDict inserts go to the MRU tail already.
+        od[key] = None
+
+    def _sample_lru_min_freq(self, od: OrderedDict) -> tuple:
+        """Return (key, freq) for the coldest sampled tail key, (None, -1)
+        if the segment is empty; callers reuse freq instead of re-estimating."""
         if not od:
-            return None
+            return None, -1
         # Randomized sampling from the LRU tail to reduce deterministic bias.
         import random
         k = min(self._sample_k, len(od))
         tail_len = min(len(od), self._sample_k * 4)
-        keys_tail = list(od.keys())[:tail_len]  # LRU-most region
+        keys_tail = list(islice(od, tail_len))  # LRU-most region
         if tail_len <= k:
-            candidates = keys_tail
+            idxs = range(tail_len)
         else:
-            # Sample without replacement from the tail region
-            candidates = random.sample(keys_tail, k)
+            # Sample positions without replacement from the tail region;
+            # visiting them in age order makes estimate ties resolve toward
+            # the LRU end with no per-key recency bookkeeping.
+            idxs = sorted(random.sample(range(tail_len), k))
+        cand_keys = [keys_tail[i] for i in idxs]
+        ests = self.sketch.estimate_many(cand_keys)
         min_key, min_f = None, None
-        for key in candidates:
-            f = self.sketch.estimate(key)
+        for key, f in zip(cand_keys, ests):
             if min_f is None or f < min_f:
                 min_f, min_key = f, key
-        return min_key if min_key is not None else self._lru(od)
+        if min_key is None:
+            return self._lru(od), -1
+        return min_key, min_f
+
+    def _sample_lru_min_n(self, od: OrderedDict, n: int) -> list:
+        """Return up to n distinct coldest keys from the LRU tail region."""
+        if not od or n <= 0:
+            return []
+        if n == 1:
+            key, _ = self._sample_lru_min_freq(od)
+            return [key] if key is not None else []
+        import heapq
+        tail_len = min(len(od), max(self._sample_k * 4, n))
+        keys_tail = list(islice(od, tail_len))  # LRU-most region
+        ests = self.sketch.estimate_many(keys_tail)
+        # Pair each estimate with its tail position so ties still resolve
+        # toward the LRU end.
+        return [key for _, _, key in heapq.nsmallest(
+            min(n, len(keys_tail)),
+            zip(ests, range(len(keys_tail)), keys_tail))]
 
     # ----- policy decisions -----
 
@@ -246,24 +371,42 @@ class _SplitWinTLFU:
         - Else consider replacing a cold M2 if new is much hotter.
         - Robust fallbacks maintain progress with preference to evict from window before main.
         """
-        self._ensure_capacity(cache_snapshot.capacity)
-        self._self_heal(cache_snapshot)
+        # Steady-state fast path: capacity almost never changes, so one
+        # attribute compare replaces the _ensure_capacity call.
+        if self.capacity != cache_snapshot.capacity:
+            self._ensure_capacity(cache_snapshot.capacity)
+        # The update hooks keep the segments mirrored on the cache, so the
+        # O(capacity) heal only runs when the O(1) length check disagrees.
+        if (len(self.W1) + len(self.W2) + len(self.M1) + len(self.M2)
+                != len(cache_snapshot.cache)):
+            self._self_heal(cache_snapshot)
+
+        # Shadow hot attributes as locals (LOAD_FAST vs LOAD_ATTR)
+        W1 = self.W1
+        W2 = self.W2
+        M1 = self.M1
+        M2 = self.M2
+        estimate = self.sketch.estimate
 
         # Cool down scan bias slightly on each eviction decision
-        if self.scan_cooldown > 0:
-            self.scan_cooldown -= 1
+        if self._scan_state > 0:
+            self._scan_state -= 1
 
-        # Candidates
-        cand_w1 = self._lru(self.W1)
-        cand_w2 = self._lru(self.W2)
-        cand_m1 = self._sample_lru_min_freq(self.M1)
-        cand_m2 = self._sample_lru_min_freq(self.M2) if cand_m1 is None else None
+        f_new = estimate(new_obj.key)
+        cand_w1 = self._lru(W1)
 
-        f_new = self.sketch.estimate(new_obj.key)
-        f_m1 = self.sketch.estimate(cand_m1) if cand_m1 is not None else -1
-        f_m2 = self.sketch.estimate(cand_m2) if cand_m2 is not None else -1
+        # Fast path: an unknown-cold newcomer (estimate 0) can never win
+        # the f_new > victim_freq + bias comparisons below, so when W1 has
+        # an LRU victim the main-segment tail sampling is pure overhead.
+        if f_new == 0 and self._scan_state <= 0 and cand_w1 is not None:
+            return cand_w1
+
+        # Candidates
+        cand_m1, f_m1 = self._sample_lru_min_freq(M1)
+        cand_m2, f_m2 = (self._sample_lru_min_freq(M2)
+                         if cand_m1 is None else (None, -1))
 
-        bias = 3 if self.scan_cooldown > 0 else 1
+        bias = 3 if self._scan_state > 0 else 1
 
         # Replace a cold probationary main entry if new is clearly hotter
         if cand_m1 is not None and f_new > (f_m1 + bias):
@@ -278,12 +421,12 @@ class _SplitWinTLFU:
             return cand_m2
 
         # Fallbacks: prefer evicting from window protected (W2) before main
-        if self.W2:
-            return self._lru(self.W2)
-        if self.M1:
-            return self._lru(self.M1)
-        if self.M2:
-            return self._lru(self.M2)
+        if W2:
+            return self._lru(W2)
+        if M1:
+            return self._lru(M1)
+        if M2:
+            return self._lru(M2)
         # Last resort: any key present
         return next(iter(cache_snapshot.cache))
 
@@ -296,93 +439,110 @@ class _SplitWinTLFU:
         - M2 hit: refresh M2.
         - Desync hit: treat as warm, place in M2.
         """
-        self._ensure_capacity(cache_snapshot.capacity)
+        # Steady-state fast path: capacity almost never changes, so one
+        # attribute compare replaces the _ensure_capacity call.
+        if self.capacity != cache_snapshot.capacity:
+            self._ensure_capacity(cache_snapshot.capacity)
         now = cache_snapshot.access_count
         key = obj.key
-        self.sketch.increment(key, 1)
 
-        # Any hit resets miss streak and cools down scan bias
-        self.miss_streak = 0
-        if self.scan_cooldown > 0:
-            self.scan_cooldown -= 1
+        # Shadow hot attributes as locals (LOAD_FAST vs LOAD_ATTR)
+        W1 = self.W1
+        W2 = self.W2
+        M1 = self.M1
+        M2 = self.M2
+        sketch = self.sketch
+        # Hash once; the fused op returns the post-increment estimate.
+        kh = hash(key)
+        est = sketch.increment_and_estimate_h(kh, 1)
+
+        # Any hit resets the miss streak and cools down scan bias:
+        # one comparison, no max() call.
+        s_state = self._scan_state
+        if s_state != 0:
+            self._scan_state = s_state - 1 if s_state > 0 else 0
 
         w_tgt, w2_tgt, _, prot_tgt = self._targets()
 
-        if key in self.W1:
+        if key in W1:
             self.hits_w += 1
             # Directly promote to main protected if sufficiently hot
-            est = self.sketch.estimate(key)
-            thr_hi = 4 if self.scan_cooldown > 0 else 3
+            thr_hi = 4 if self._scan_state > 0 else 3
             if est >= thr_hi:
-                self.W1.pop(key, None)
-                self._touch(self.M2, key)
+                W1.pop(key, None)
+                self._touch_insert(M2, key)
                 self.hits_main += 1
                 self.prom_m2 += 1
                 # Keep M2 within target by demoting a low-freq entry to M1
-                if len(self.M2) > prot_tgt:
-                    demote = self._sample_lru_min_freq(self.M2)
-                    if demote is not None:
-                        self.M2.pop(demote, None)
-                        self._touch(self.M1, demote)
+                overshoot = len(M2) - prot_tgt
+                if overshoot > 0:
+                    for demote in self._sample_lru_min_n(M2, overshoot):
+                        M2.pop(demote, None)
+                        self._touch_insert(M1, demote)
                         self.dem_m2 += 1
             else:
                 # Otherwise promote to window protected
-                self.W1.pop(key, None)
-                self._touch(self.W2, key)
+                W1.pop(key, None)
+                self._touch_insert(W2, key)
                 self.hits_w2 += 1
-                if len(self.W2) > w2_tgt:
-                    demote = self._lru(self.W2)
+                if len(W2) > w2_tgt:
+                    demote = self._lru(W2)
                     if demote is not None:
-                        self.W2.pop(demote, None)
-                        self._touch(self.W1, demote)
-            self._maybe_tune(now)
+                        W2.pop(demote, None)
+                        self._touch_insert(W1, demote)
+            if 0 < self.tune_period <= now - self.last_tune_time:
+                self._maybe_tune(now)
             return
 
-        if key in self.W2:
+        if key in W2:
             self.hits_w += 1
             self.hits_w2 += 1
-            self._touch(self.W2, key)
+            self._touch_insert(W2, key)
             # If W2 grew past target (could happen due to prior changes), demote LRU to W1
-            if len(self.W2) > w2_tgt:
-                demote = self._lru(self.W2)
+            if len(W2) > w2_tgt:
+                demote = self._lru(W2)
                 if demote is not None:
-                    self.W2.pop(demote, None)
-                    self._touch(self.W1, demote)
-            self._maybe_tune(now)
+                    W2.pop(demote, None)
+                    self._touch_insert(W1, demote)
+            if 0 < self.tune_period <= now - self.last_tune_time:
+                self._maybe_tune(now)
             return
 
-        if key in self.M1:
+        if key in M1:
             self.hits_main += 1
             # Promote to main protected
-            self.M1.pop(key, None)
-            self._touch(self.M2, key)
+            M1.pop(key, None)
+            self._touch_insert(M2, key)
             self.prom_m2 += 1
             # Keep M2 within target by demoting low-freq from M2 to M1
-            if len(self.M2) > prot_tgt:
-                demote = self._sample_lru_min_freq(self.M2)
-                if demote is not None:
-                    self.M2.pop(demote, None)
-                    self._touch(self.M1, demote)
+            overshoot = len(M2) - prot_tgt
+            if overshoot > 0:
+                for demote in self._sample_lru_min_n(M2, overshoot):
+                    M2.pop(demote, None)
+                    self._touch_insert(M1, demote)
                     self.dem_m2 += 1
-            self._maybe_tune(now)
+            if 0 < self.tune_period <= now - self.last_tune_time:
+                self._maybe_tune(now)
             return
 
-        if key in self.M2:
+        if key in M2:
             self.hits_main += 1
-            self._touch(self.M2, key)
-            self._maybe_tune(now)
+            self._touch_insert(M2, key)
+            if 0 < self.tune_period <= now - self.last_tune_time:
+                self._maybe_tune(now)
             return
 
         # Desync: assume it's warm and place into M2
         self.hits_main += 1
-        self._touch(self.M2, key)
-        if len(self.M2) > prot_tgt:
-            demote = self._sample_lru_min_freq(self.M2)
-            if demote is not None:
-                self.M2.pop(demote, None)
-                self._touch(self.M1, demote)
+        self._touch_insert(M2, key)
+        overshoot = len(M2) - prot_tgt
+        if overshoot > 0:
+            for demote in self._sample_lru_min_n(M2, overshoot):
+                M2.pop(demote, None)
+                self._touch_insert(M1, demote)
                 self.dem_m2 += 1
-        self._maybe_tune(now)
+        if 0 < self.tune_period <= now - self.last_tune_time:
+            self._maybe_tune(now)
 
     def on_insert(self, cache_snapshot, obj):
         """
@@ -394,87 +554,99 @@ class _SplitWinTLFU:
         - Maintain M2 within its target (demote low-freq M2 to M1).
         - Update scan detector.
         """
-        self._ensure_capacity(cache_snapshot.capacity)
+        # Steady-state fast path: capacity almost never changes, so one
+        # attribute compare replaces the _ensure_capacity call.
+        if self.capacity != cache_snapshot.capacity:
+            self._ensure_capacity(cache_snapshot.capacity)
         now = cache_snapshot.access_count
         key = obj.key
-        self.sketch.increment(key, 1)
 
-        # Update scan detector for consecutive misses with capacity-aware threshold
-        self.miss_streak += 1
-        thr = max(16, (self.capacity or 1) // 2)
-        if self.miss_streak > thr:
-            self.scan_cooldown = max(self.scan_cooldown, thr)
-        else:
-            if self.scan_cooldown > 0:
-                self.scan_cooldown -= 1
+        # Shadow hot attributes as locals (LOAD_FAST vs LOAD_ATTR)
+        W1 = self.W1
+        W2 = self.W2
+        M1 = self.M1
+        M2 = self.M2
+        sketch = self.sketch
+        # Hash once; the fused op returns the post-increment estimate used
+        # by the early-bypass admission check below.
+        kh = hash(key)
+        f_new = sketch.increment_and_estimate_h(kh, 1)
+
+        # Update scan detector for consecutive misses with capacity-aware
+        # threshold; a single decrement serves both the cooldown decay and
+        # the miss-streak count.
+        s_state = self._scan_state - 1
+        thr = self._scan_thr
+        self._scan_state = thr if -s_state > thr else s_state
 
         # Ensure it's not tracked elsewhere (idempotent)
-        self.W1.pop(key, None)
-        self.W2.pop(key, None)
-        self.M1.pop(key, None)
-        self.M2.pop(key, None)
+        W1.pop(key, None)
+        W2.pop(key, None)
+        M1.pop(key, None)
+        M2.pop(key, None)
 
         # Insert into W1 (probationary)
-        self._touch(self.W1, key)
+        self._touch_insert(W1, key)
 
         # Early bypass: if new is already hot by TinyLFU, admit to M1 directly (gated)
-        cand_m1_early = self._sample_lru_min_freq(self.M1)
-        f_new = self.sketch.estimate(key)
-        f_m1_early = self.sketch.estimate(cand_m1_early) if cand_m1_early is not None else -1
-        bias_early = 3 if self.scan_cooldown > 0 else 1
-        thr_hi = 4 if self.scan_cooldown > 0 else 3
+        cand_m1_early, f_m1_early = self._sample_lru_min_freq(M1)
+        bias_early = 3 if self._scan_state > 0 else 1
+        thr_hi = 4 if self._scan_state > 0 else 3
         if f_new >= thr_hi and f_new >= (f_m1_early + bias_early):
-            self.W1.pop(key, None)
-            self._touch(self.M1, key)
+            W1.pop(key, None)
+            self._touch_insert(M1, key)
 
         # Rebalance window size vs target
         w_tgt, w2_tgt, _, prot_tgt = self._targets()
         # If window exceeds target, consider moving W1's LRU to M1 using TinyLFU comparison
-        if (len(self.W1) + len(self.W2)) > w_tgt:
-            w1_lru = self._lru(self.W1)
+        if (len(W1) + len(W2)) > w_tgt:
+            w1_lru = self._lru(W1)
             if w1_lru is not None and w1_lru != key:
-                cand_m1 = self._sample_lru_min_freq(self.M1)
-                f_w1 = self.sketch.estimate(w1_lru)
-                f_m1 = self.sketch.estimate(cand_m1) if cand_m1 is not None else -1
-                bias = 3 if self.scan_cooldown > 0 else 1
+                cand_m1, f_m1 = self._sample_lru_min_freq(M1)
+                f_w1 = sketch.estimate(w1_lru)
+                bias = 3 if self._scan_state > 0 else 1
                 if f_w1 >= (f_m1 + bias):
                     # Admit into probationary main
-                    self.W1.pop(w1_lru, None)
-                    self._touch(self.M1, w1_lru)
+                    W1.pop(w1_lru, None)
+                    self._touch_insert(M1, w1_lru)
                 else:
                     # Keep in window; refresh to avoid immediate churn
-                    self._touch(self.W1, w1_lru)
+                    self._touch_existing(W1, w1_lru)
             else:
                 # If W1 empty (rare), demote W2 LRU back to W1
-                w2_lru = self._lru(self.W2)
+                w2_lru = self._lru(W2)
                 if w2_lru is not None:
-                    self.W2.pop(w2_lru, None)
-                    self._touch(self.W1, w2_lru)
+                    W2.pop(w2_lru, None)
+                    self._touch_insert(W1, w2_lru)
 
         # Keep W2 within its target size by demoting its LRU to W1
-        if len(self.W2) > w2_tgt:
-            demote_w2 = self._lru(self.W2)
+        if len(W2) > w2_tgt:
+            demote_w2 = self._lru(W2)
             if demote_w2 is not None:
-                self.W2.pop(demote_w2, None)
-                self._touch(self.W1, demote_w2)
+                W2.pop(demote_w2, None)
+                self._touch_insert(W1, demote_w2)
 
         # Keep M2 within target (freq-aware demotion)
-        if len(self.M2) > prot_tgt:
-            demote = self._sample_lru_min_freq(self.M2)
-            if demote is not None:
-                self.M2.pop(demote, None)
-                self._touch(self.M1, demote)
+        overshoot = len(M2) - prot_tgt
+        if overshoot > 0:
+            for demote in self._sample_lru_min_n(M2, overshoot):
+                M2.pop(demote, None)
+                self._touch_insert(M1, demote)
                 self.dem_m2 += 1
 
         # Periodically tune parameters
-        self._maybe_tune(now)
+        if 0 < self.tune_period <= now - self.last_tune_time:
+            self._maybe_tune(now)
 
     def on_evict(self, cache_snapshot, obj, evicted_obj):
         """
         Eviction post-processing:
         - Remove evicted key from all segments.
         """
-        self._ensure_capacity(cache_snapshot.capacity)
+        # Steady-state fast path: capacity almost never changes, so one
+        # attribute compare replaces the _ensure_capacity call.
+        if self.capacity != cache_snapshot.capacity:
+            self._ensure_capacity(cache_snapshot.capacity)
         k = evicted_obj.key
         self.W1.pop(k, None)
         self.W2.pop(k, None)
@@ -527,9 +699,13 @@ def run_caching(trace_path: str, copy_code_dst: str):
     trace = Trace(trace_path=trace_path)
     cache_capacity = max(int(trace.get_ndv() * 0.1), 1)
     cache = Cache(CacheConfig(cache_capacity))
-    for entry in trace.entries:
-        obj = CacheObj(key=str(entry.key))
-        cache.get(obj)
+    # Keep keys as ints end to end: hash(int) is trivial and unsalted, so
+    # per-access dict lookups are cheaper and runs reproduce across
+    # processes; no TraceEntry materialization is needed for the key column.
+    keys = trace.keys
+    get = cache.get
+    for key in keys:
+        get(CacheObj(key=key))
     with open(copy_code_dst, 'w') as f:
         f.write("")
     hit_rate = round(cache.hit_count / cache.access_count, 6)
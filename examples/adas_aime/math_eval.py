@@ -1,3 +1,4 @@
+import functools
 import time
 import multiprocessing
 import concurrent.futures
@@ -6,12 +7,20 @@ import pandas as pd
 from utils import remove_boxed, last_boxed_only_string, is_equiv
 
 
+@functools.lru_cache(maxsize=1)
+def _load_math_test_set(path: str) -> pd.DataFrame:
+    # The dataset is re-read on every evaluation call; parse it once per
+    # process and reuse. Callers only filter/iterate the frame, so sharing
+    # the cached object is safe.
+    return pd.read_csv(path)
+
+
 def agent_evaluation(
     Agent,
     query_llm: Callable,
     year: int = 2024,
 ) -> tuple[float, float, int, int, pd.DataFrame]:
-    math_test_set = pd.read_csv("AIME_Dataset_1983_2025.csv")
+    math_test_set = _load_math_test_set("AIME_Dataset_1983_2025.csv")
     math_test_set = math_test_set[math_test_set["Year"] == year]
     agent = Agent(query_llm)
 
@@ -2,13 +2,51 @@ import os
 import random
 random.seed(42) # set the random seed before importing `My` to enable reproduction
 import My
-import importlib
 import struct
 from typing import List
 import numpy as np
 
+# Compiled-code cache for My.py, keyed on (mtime_ns, size). Re-executing
+# My on every Cache construction is required — the evaluator runs all
+# traces in one process and the re-exec is what resets module-level
+# policy state between runs — but recompiling the unchanged source each
+# time is not.
+_my_code_cache = (None, None)
+
+
+def _reload_my():
+    path = My.__file__
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached_stamp, code = _my_code_cache
+    if code is None or cached_stamp != stamp:
+        with open(path, "r", encoding="utf-8") as f:
+            code = compile(f.read(), path, "exec")
+        globals()["_my_code_cache"] = (stamp, code)
+    # Same semantics as importlib.reload: re-execute into the existing
+    # module namespace, rebinding module-level state.
+    exec(code, My.__dict__)
+
+
+# Binary trace record layout; the struct packer and dtype must agree.
+_ENTRY_STRUCT = struct.Struct("<IQIq")
+_ENTRY_SIZE = _ENTRY_STRUCT.size
+_MASK32 = 0xffffffff
+_MASK64 = 0xffffffffffffffff
+
+TRACE_DTYPE = np.dtype([
+    ("time", "<u4"),
+    ("key", "<u8"),
+    ("size", "<u4"),
+    ("next_vtime", "<i8"),
+])
+
 
 class TraceEntry:
+    # No per-instance __dict__: traces materialize millions of entries,
+    # and slots cut each one by ~100 bytes while speeding attribute loads.
+    __slots__ = ("time", "key", "size", "next_vtime")
+
     def __init__(self, time: int, key: int, size: int, next_vtime: int):
         self.time = time
         self.key = key
@@ -17,15 +55,18 @@ class TraceEntry:
 
     @classmethod
     def from_bin(cls, data: bytes):
-        s = struct.Struct("<IQIq")
-        return TraceEntry(*s.unpack(data))
+        # int.from_bytes on fixed slices outruns struct.unpack per record
+        # and allocates no Struct object.
+        return TraceEntry(int.from_bytes(data[0:4], "little"),
+                          int.from_bytes(data[4:12], "little"),
+                          int.from_bytes(data[12:16], "little"),
+                          int.from_bytes(data[16:24], "little", signed=True))
 
     def to_bin(self):
-        s = struct.Struct("<IQIq")
-        return s.pack(self._signed_2_unsigned(4, int(self.time)), 
-                      self._signed_2_unsigned(8, int(self.key)), 
-                      self._signed_2_unsigned(4, int(self.size)), 
-                      int(self.next_vtime))
+        return _ENTRY_STRUCT.pack(int(self.time) & _MASK32,
+                                  int(self.key) & _MASK64,
+                                  int(self.size) & _MASK32,
+                                  int(self.next_vtime))
     @classmethod
     def from_csv(cls, row: str):
         row = row.strip().split(",")
@@ -40,107 +81,188 @@ class TraceEntry:
     def __repr__(self):
         return self.__str__()
 
-    def _signed_2_unsigned(self, byte, x):
-        assert isinstance(x, int)
-        if byte == 4:
-            return x & 0xffffffff
-        elif byte == 8:
-            return x & 0xffffffffffffffff
-        else:
-            raise ValueError
-
 class Trace:
     def __init__(self, trace_path: str, next_vtime_set: bool = True):
-        self.entries: List[TraceEntry] = []
+        # Entries are stored as one structured ndarray (SoA): a single
+        # np.fromfile call parses the whole binary trace in C instead of
+        # one struct.unpack plus TraceEntry allocation per record.
+        # TraceEntry objects are materialized lazily on first access to
+        # `entries`.
+        self._entries: List[TraceEntry] = None
         if trace_path.endswith(".bin"):
-            s = struct.Struct("<IQIq")
-            with open(trace_path, "rb") as f:
-                while True:
-                    data = f.read(s.size)
-                    if not data:
-                        break
-                    trace_entry = TraceEntry.from_bin(data)
-                    self.entries.append(trace_entry)
+            if next_vtime_set and os.path.getsize(trace_path) > 0:
+                # Zero-copy map: only touched pages are faulted in, and
+                # concurrent runs over the same trace share the OS page
+                # cache. The writable fromfile copy is only needed when
+                # next_vtime must be recomputed in place.
+                self._arr = np.memmap(trace_path, dtype=TRACE_DTYPE,
+                                      mode="r")
+            else:
+                self._arr = np.fromfile(trace_path, dtype=TRACE_DTYPE)
         elif trace_path.endswith(".csv"):
-            with open(trace_path, "r") as f:
-                for line in f:
-                    trace_entry = TraceEntry.from_csv(line)
-                    self.entries.append(trace_entry)
+            # pandas' C parser replaces the per-line split + four int()
+            # calls; imported lazily since the evaluator only loads .bin.
+            import pandas as pd
+            df = pd.read_csv(
+                trace_path, header=None,
+                names=["time", "key", "size", "next_vtime"],
+                dtype={"time": "u4", "key": "u8", "size": "u4",
+                       "next_vtime": "i8"},
+                engine="c",
+            )
+            self._arr = np.empty(df.shape[0], dtype=TRACE_DTYPE)
+            for name in TRACE_DTYPE.names:
+                self._arr[name] = df[name].to_numpy()
+        else:
+            self._arr = np.empty(0, dtype=TRACE_DTYPE)
         if next_vtime_set == False:
-            self.set_next_vtime()
+            # The column only depends on the trace itself, so it is
+            # memoized in a sidecar file and recomputed only when the
+            # trace is newer than the sidecar.
+            if not self._load_next_vtime_sidecar(trace_path):
+                self.set_next_vtime()
+                self._save_next_vtime_sidecar(trace_path)
 
-    def get_key_set(self, range_s: int=None, range_e: int=None):
+    @staticmethod
+    def _sidecar_path(trace_path: str) -> str:
+        return trace_path + ".nxt.npy"
+
+    def _load_next_vtime_sidecar(self, trace_path: str) -> bool:
+        sidecar = self._sidecar_path(trace_path)
+        try:
+            if not (os.path.exists(sidecar)
+                    and os.path.getmtime(sidecar) >= os.path.getmtime(trace_path)):
+                return False
+            nxt = np.load(sidecar, mmap_mode="r")
+        except (OSError, ValueError):
+            return False
+        if nxt.shape != (self._arr.shape[0],):
+            return False
+        self._arr["next_vtime"] = nxt
+        return True
+
+    def _save_next_vtime_sidecar(self, trace_path: str):
+        try:
+            np.save(self._sidecar_path(trace_path), self._arr["next_vtime"])
+        except OSError:
+            pass  # read-only trace dir: just recompute next time
+
+    @property
+    def keys(self):
+        # Key column as ready-to-hash Python ints, without materializing
+        # TraceEntry objects.
+        return self._arr["key"].tolist()
+
+    @property
+    def entries(self) -> List[TraceEntry]:
+        if self._entries is None:
+            self._entries = [TraceEntry(*row) for row in self._arr.tolist()]
+        return self._entries
+
+    def _keys_in_range(self, range_s: int=None, range_e: int=None):
         '''
         [range_s, range_e)
         '''
+        keys = self._arr["key"]
         if range_s == None and range_e == None:
-            return set([entry.key for entry in self.entries])
+            return keys
         elif range_s != None:
-            range_s = np.clip(range_s, 0, self.get_len() - 1)
-            return set([entry.key for entry in self.entries[range_s:]])
+            range_s = int(np.clip(range_s, 0, self.get_len() - 1))
+            return keys[range_s:]
         elif range_e != None:
-            range_e = np.clip(range_e, 0, self.get_len())
-            return set([entry.key for entry in self.entries[:range_e]])
-        range_s = np.clip(range_s, 0, self.get_len() - 1)
-        range_e = np.clip(range_e, 0, self.get_len())
+            range_e = int(np.clip(range_e, 0, self.get_len()))
+            return keys[:range_e]
+        range_s = int(np.clip(range_s, 0, self.get_len() - 1))
+        range_e = int(np.clip(range_e, 0, self.get_len()))
         if range_s >= range_e:
-            return set()
-        return set([entry.key for entry in self.entries[range_s:range_e]])
+            return keys[:0]
+        return keys[range_s:range_e]
+
+    def get_key_set(self, range_s: int=None, range_e: int=None):
+        '''
+        [range_s, range_e)
+        '''
+        # np.unique sorts in C; tolist() yields Python ints for the set.
+        return set(np.unique(self._keys_in_range(range_s, range_e)).tolist())
 
     def get_ndv(self, range_s: int=None, range_e: int=None):
         '''
         [range_s, range_e)
         '''
-        return len(self.get_key_set(range_s=range_s, range_e=range_e))
+        # Distinct-count without materializing a Python set.
+        return int(np.unique(self._keys_in_range(range_s, range_e)).size)
     
     def get_len(self):
-        return len(self.entries)
-    
+        return int(self._arr.shape[0])
+
+    def iter_chunks(self, chunk_size: int=1 << 20):
+        '''
+        Yield successive structured-array chunks of the trace for
+        bounded-memory streaming. With the memmapped backing of .bin
+        traces, only the pages of the chunk being consumed are resident,
+        so arbitrarily large traces never have to fit in RAM.
+        '''
+        n = self.get_len()
+        for start in range(0, n, chunk_size):
+            yield self._arr[start:start + chunk_size]
+
     def set_next_vtime(self):
-        m_key_vtime = {}
-        for entry in self.entries[::-1]:
-            if entry.key in m_key_vtime:
-                entry.next_vtime = m_key_vtime[entry.key]
-            else:
-                entry.next_vtime = -1
-            m_key_vtime[entry.key] = entry.time
+        # Vectorized groupby-on-key: sort positions by (key, position) so
+        # occurrences of each key become consecutive runs, then each
+        # position's next_vtime is the time of its successor within the
+        # run, with -1 at run ends. Replaces the per-entry reverse loop.
+        n = self._arr.shape[0]
+        if n == 0:
+            return
+        keys = self._arr["key"]
+        times = self._arr["time"]
+        order = np.lexsort((np.arange(n), keys))
+        sorted_keys = keys[order]
+        nxt = self._arr["next_vtime"]
+        nxt[order[:-1]] = times[order[1:]].astype(np.int64)
+        nxt[order[-1]] = -1
+        if n > 1:
+            boundary = sorted_keys[:-1] != sorted_keys[1:]
+            nxt[order[:-1][boundary]] = -1
+        self._entries = None  # force re-materialization with updated column
     
     def to_bin(self, path: str, start=None, end=None):
         if start == None or start < 0:
             start = 0
-        if end == None or end > len(self.entries):
-            end = len(self.entries)
-        with open(path, "wb") as f:
-            for entry in self.entries[start:end]:
-                f.write(entry.to_bin())
+        if end == None or end > self.get_len():
+            end = self.get_len()
+        # One streaming write of the structured array instead of a
+        # pack+write syscall pair per record.
+        self._arr[start:end].tofile(path)
 
     def to_csv(self, path: str, start=None, end=None):
         if start == None or start < 0:
             start = 0
-        if end == None or end > len(self.entries):
-            end = len(self.entries)
-        with open(path, "w") as f:
-            for entry in self.entries[start:end]:
-                f.write(entry.to_csv() + "\n")
+        if end == None or end > self.get_len():
+            end = self.get_len()
+        import pandas as pd
+        pd.DataFrame(self._arr[start:end]).to_csv(path, header=False,
+                                                  index=False)
 
 class CacheObj:
+    # Plain slotted attributes: one CacheObj is built per trace access and
+    # policies read obj.key/obj.size constantly, so the former read-only
+    # property descriptors (plus name-mangled backing fields) were pure
+    # per-access overhead. Treated as immutable by convention.
+    __slots__ = ("key", "size")
+
     def __init__(self, key, size=1, consider_obj_size=False):
-        if not isinstance(key, str):
-            raise ValueError("KEY must be a string.")
+        # int keys hash trivially and without per-process salting, unlike
+        # str; str keys remain accepted for existing callers.
+        if not isinstance(key, (int, str)):
+            raise ValueError("KEY must be an int or a string.")
         if not isinstance(size, int) or not size > 0:
             raise ValueError("SIZE must be a positive integer.")
-        
-        self.__key = key
-        self.__size = size if consider_obj_size == True else 1 # size in bytes
 
-    @property
-    def size(self): # read-only
-        return self.__size
-    
-    @property
-    def key(self): # read-only
-        return self.__key
-    
+        self.key = key
+        self.size = size if consider_obj_size == True else 1 # size in bytes
+
+
 class CacheConfig:
     def __init__(self, capacity: int, consider_obj_size: bool=False, key_col_id=1, size_col_id=2, has_header: bool=False, delimiter=","):
         if not isinstance(capacity, int) or not capacity > 0:
@@ -169,14 +291,28 @@ class CacheConfig:
         }
     
 class Cache:
-    def __init__(self, config: CacheConfig):
+    def __init__(self, config: CacheConfig, debug: bool = False):
         assert isinstance(config, CacheConfig)
-       
+
+        # The isinstance/assert guards in the per-access methods run once
+        # per trace entry; they only catch harness-side programming errors,
+        # so they are skipped unless debug is requested at construction.
+        self.__debug = debug
         self.__capacity = config.capacity
         self.__cache = dict() # a map from key to cache_obj
         self.__naccess = 0
         self.__nhit = 0
-        importlib.reload(My)
+        self.__cur_size = 0  # maintained incrementally by insert/evict
+        # Plain attribute, not a property: read once per policy callback.
+        self.snapshot = self
+        # Specialized at construction: with unit-size objects a full cache
+        # needs exactly one eviction per miss, so the general byte-counting
+        # loop is never entered.
+        if config.consider_obj_size:
+            self._evict_until_fit = self._evict_until_fit_general
+        else:
+            self._evict_until_fit = self._evict_one_if_full
+        _reload_my()
         self.update_after_insert_func = My.update_after_insert
         self.update_after_evict_func = My.update_after_evict
         self.update_after_hit_func = My.update_after_hit
@@ -188,6 +324,9 @@ class Cache:
     
     @property
     def size(self): # read-only
+        return self.__cur_size
+
+    def _scan_size(self): # debug cross-check of the incremental counter
         tot_size = 0
         for obj in self.__cache.values():
             assert isinstance(obj, CacheObj)
@@ -212,18 +351,16 @@ class Cache:
     def miss_count(self):
         return self.__naccess - self.__nhit
     
-    @property
-    def snapshot(self): # read-only
-        return self
 
 
     def get(self, obj) -> bool: # never exposed to LLM
         self.__naccess += 1
-        
-        if not isinstance(obj, CacheObj):
+
+        if self.__debug and not isinstance(obj, CacheObj):
             raise ValueError("OBJ must be an instance of CacheObj")
 
-        if obj.key in self.cache:
+        # Membership test against the raw dict, not the `cache` property.
+        if obj.key in self.__cache:
             # hit, return true
             # update
             self.__nhit += 1
@@ -231,48 +368,59 @@ class Cache:
             return True
         else:
             # miss, return False
-            if not self.can_insert(obj):
-                return False
-            if not self.admit(obj):
+            # can_insert and admit both reduce to this one comparison.
+            if obj.size > self.__capacity:
                 return False
-            while self.size + obj.size > self.capacity:
-                evicted_cache_object = self.evict(obj)
-                self.update_after_evict(obj, evicted_cache_object)
-            assert self.size + obj.size <= self.capacity
+            self._evict_until_fit(obj)
+            if self.__debug:
+                assert self.size + obj.size <= self.capacity
             self.insert(obj)
             self.update_after_insert(obj)
             return False
             
         
+    def _evict_one_if_full(self, obj): # never exposed to LLM
+        if len(self.__cache) >= self.__capacity:
+            evicted_cache_object = self.evict(obj)
+            self.update_after_evict(obj, evicted_cache_object)
+
+    def _evict_until_fit_general(self, obj): # never exposed to LLM
+        while self.size + obj.size > self.capacity:
+            evicted_cache_object = self.evict(obj)
+            self.update_after_evict(obj, evicted_cache_object)
+
     def update_after_hit(self, obj): # never exposed to LLM
-        if not isinstance(obj, CacheObj):
-            raise ValueError("OBJ must be an instance of CacheObj.")
-        if not obj.key in self.__cache:
-            raise ValueError("OBJ must be in cache after hit.")
+        if self.__debug:
+            if not isinstance(obj, CacheObj):
+                raise ValueError("OBJ must be an instance of CacheObj.")
+            if not obj.key in self.__cache:
+                raise ValueError("OBJ must be in cache after hit.")
 
         self.update_after_hit_func(self.snapshot, obj)
 
     def update_after_insert(self, obj): # never exposed to LLM
-        if not isinstance(obj, CacheObj):
-            raise ValueError("OBJ must be an instance of CacheObj.")
-        if not obj.key in self.__cache:
-            raise ValueError("OBJ must be in cache after insert.")
-        
+        if self.__debug:
+            if not isinstance(obj, CacheObj):
+                raise ValueError("OBJ must be an instance of CacheObj.")
+            if not obj.key in self.__cache:
+                raise ValueError("OBJ must be in cache after insert.")
+
         self.update_after_insert_func(self.snapshot, obj)
     
     def update_after_evict(self, obj, evicted_obj): # never exposed to LLM
-        if not isinstance(obj, CacheObj):
-            raise ValueError("OBJ must be an instance of CacheObj.")
-        if obj.key in self.__cache:
-            raise ValueError("OBJ must not be in cache before eviction completes.")
-        if evicted_obj != None:
-            if not isinstance(evicted_obj, CacheObj):
-                raise ValueError("EVICTED_OBJ must be an instance of CacheObj if not None.")
-            if evicted_obj.key in self.__cache:
-                raise ValueError("EVICTED_OBJ must not be in cache after eviction.")
-        else:
-            raise ValueError("EVICTIED_OBJ must not be None.")
-        
+        if self.__debug:
+            if not isinstance(obj, CacheObj):
+                raise ValueError("OBJ must be an instance of CacheObj.")
+            if obj.key in self.__cache:
+                raise ValueError("OBJ must not be in cache before eviction completes.")
+            if evicted_obj != None:
+                if not isinstance(evicted_obj, CacheObj):
+                    raise ValueError("EVICTED_OBJ must be an instance of CacheObj if not None.")
+                if evicted_obj.key in self.__cache:
+                    raise ValueError("EVICTED_OBJ must not be in cache after eviction.")
+            else:
+                raise ValueError("EVICTIED_OBJ must not be None.")
+
         self.update_after_evict_func(self.snapshot, obj, evicted_obj)
     
     def evict(self, obj): # never exposed to LLM
@@ -281,24 +429,23 @@ class Cache:
         - evicted_cache_obj (CacheObj): the evicted cache object.
         '''
         candid_obj_key = self.evict_func(self.snapshot, obj)
+        # Kept unconditionally: a policy returning an invalid victim must
+        # surface as a clear ValueError, not a bare KeyError from pop.
         if candid_obj_key == None or candid_obj_key not in self.__cache:
             raise ValueError("CANDID_OBJ_KEY must be in cache")
-        assert candid_obj_key != None
-        assert candid_obj_key in self.__cache
-        candid_obj_size = self.__cache[candid_obj_key].size
-        old_size = self.size
         evicted_cache_obj = self.__cache.pop(candid_obj_key)
-        new_size = self.size
-        assert new_size == old_size - candid_obj_size
+        self.__cur_size -= evicted_cache_obj.size
+        if self.__debug:
+            assert self.__cur_size == self._scan_size()
         return evicted_cache_obj
 
     def insert(self, obj): # never exposed to LLM
-        assert obj.key not in self.__cache
-        old_size = self.size
-        obj_size = obj.size
+        if self.__debug:
+            assert obj.key not in self.__cache
         self.__cache[obj.key] = obj
-        new_size = self.size
-        assert old_size + obj_size == new_size
+        self.__cur_size += obj.size
+        if self.__debug:
+            assert self.__cur_size == self._scan_size()
 
     def can_insert(self, obj): # never exposed to LLM
         if obj.size > self.capacity:
@@ -306,6 +453,4 @@ class Cache:
         return True
     
     def admit(self, obj): # never exposed to LLM
-        should_admit = (self.capacity >= obj.size)
-        assert isinstance(should_admit, bool)
-        return should_admit
+        return self.capacity >= obj.size
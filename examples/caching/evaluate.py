@@ -3,23 +3,40 @@ Evaluator for Caching example
 """
 import os
 import argparse
+import multiprocessing
+import tempfile
+import time
 import numpy as np
 from typing import Tuple, Optional, List, Dict, Any
 
-from shinka.core import run_shinka_eval
+# shinka.core is imported lazily inside the functions that need it: the
+# package pulls in the whole evolution runner (hydra, omegaconf, ...),
+# which costs a few hundred ms that --help and the pool workers never use.
 
 TRACE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trace')
 TRACE_FILES = [
     os.path.join(TRACE_FOLDER, f)
     for f in sorted(os.listdir(TRACE_FOLDER))
 ]
+COPY_CODE_DST_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "My.py"
+)
+# My.py is the same file for every run; stat it once instead of once per
+# run_index.
+_copy_code_dst_checked = False
+# Per-run kwargs are fixed up front; callers unpack them without mutating,
+# so the prebuilt dicts are shared across invocations.
+_RUN_KWARGS = tuple(
+    {"trace_path": trace_path, "copy_code_dst": COPY_CODE_DST_PATH}
+    for trace_path in TRACE_FILES
+)
 
 def format_results_string(hit_rates: List[float]) -> str:
     """Formats Caching results into a multi-line string for display."""
-    result = []
-    for i, hit_rate in enumerate(hit_rates):
-        result.append(f"  trace_{i+1}_hit_rate = {hit_rate:.4f}")
-    return "\n".join(result)
+    return "\n".join(
+        f"  trace_{i+1}_hit_rate = {hit_rate:.4f}"
+        for i, hit_rate in enumerate(hit_rates)
+    )
 
 def adapted_validate_caching(
     run_output: float,
@@ -52,23 +69,20 @@ def get_caching_kwargs(run_index: int) -> Dict[str, Any]:
     """
 
     assert 0 <= run_index < len(TRACE_FILES), f"Invalid run index: {run_index}"
-    
+
     trace_path = TRACE_FILES[run_index]
-    copy_code_dst_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "My.py"
-    )
-    
+
     # Check if trace exists
     if not os.path.exists(trace_path):
         raise FileNotFoundError(f"Trace not found: {trace_path}")
-    # Check if copy_code_dst_path exists
-    if not os.path.exists(copy_code_dst_path):
-        raise FileNotFoundError(f"Copy code destination not found: {copy_code_dst_path}")
-    
-    return {
-        "trace_path": trace_path,
-        "copy_code_dst": copy_code_dst_path,
-    }
+    # Check if the copy code destination exists (once per process)
+    global _copy_code_dst_checked
+    if not _copy_code_dst_checked:
+        if not os.path.exists(COPY_CODE_DST_PATH):
+            raise FileNotFoundError(f"Copy code destination not found: {COPY_CODE_DST_PATH}")
+        _copy_code_dst_checked = True
+
+    return _RUN_KWARGS[run_index]
 
 
 def aggregate_caching_metrics(
@@ -112,11 +126,119 @@ def aggregate_caching_metrics(
     return metrics
 
 
-def main(program_path: str, results_dir: str):
+# Per-worker state for parallel evaluation; set once by the pool
+# initializer so the program module is loaded a single time per process.
+_worker_run_caching = None
+_worker_copy_code_dst = None
+
+
+def _init_trace_worker(program_path: str):
+    """Pool initializer: load the program once per worker process.
+
+    Each worker gets a private scratch file as `copy_code_dst` so that
+    concurrent runs never touch the shared `My.py` — the parent writes
+    `My.py` once before the pool starts and truncates it after.
+    """
+    from shinka.core.wrap_eval import load_program
+
+    global _worker_run_caching, _worker_copy_code_dst
+    module = load_program(program_path)
+    _worker_run_caching = module.run_caching
+    fd, _worker_copy_code_dst = tempfile.mkstemp(suffix=".py")
+    os.close(fd)
+
+
+def _run_one_trace(trace_path: str) -> Tuple[float, float]:
+    """Runs a single trace in a worker; returns (hit_rate, elapsed_s)."""
+    # Reseed per trace so each hit rate is a pure function of the trace,
+    # independent of how traces are distributed over workers.
+    import random
+    random.seed(42)
+    start_time = time.perf_counter()
+    hit_rate = _worker_run_caching(
+        trace_path=trace_path, copy_code_dst=_worker_copy_code_dst
+    )
+    return hit_rate, time.perf_counter() - start_time
+
+
+def run_parallel_eval(
+    program_path: str, results_dir: str, num_workers: int
+) -> Tuple[Dict[str, Any], bool, Optional[str]]:
+    """
+    Evaluates all traces concurrently with a process pool.
+
+    Traces are independent, so this is an embarrassingly-parallel drop-in
+    for the sequential `run_shinka_eval` loop; validation, aggregation,
+    and the saved metrics format match the sequential path.
+    """
+    from shinka.core.wrap_eval import save_json_results
+
+    copy_code_dst_path = COPY_CODE_DST_PATH
+    with open(program_path, "r", encoding="utf-8") as f:
+        code_str = f.read()
+
+    trace_paths = [
+        get_caching_kwargs(i)["trace_path"] for i in range(len(TRACE_FILES))
+    ]
+
+    # The policy source must be stable in My.py for the lifetime of the
+    # pool: every Cache constructed in any worker re-executes it.
+    with open(copy_code_dst_path, "w") as f:
+        f.write(code_str)
+    try:
+        num_workers = min(num_workers, len(trace_paths))
+        with multiprocessing.Pool(
+            processes=num_workers,
+            initializer=_init_trace_worker,
+            initargs=(program_path,),
+        ) as pool:
+            outcomes = pool.map(_run_one_trace, trace_paths)
+    finally:
+        with open(copy_code_dst_path, "w") as f:
+            f.write("")
+
+    results = [hit_rate for hit_rate, _ in outcomes]
+    execution_times = [elapsed for _, elapsed in outcomes]
+
+    overall_correct_flag = True
+    first_error_message: Optional[str] = None
+    all_validation_errors_list: List[str] = []
+    num_valid_runs = 0
+    num_invalid_runs = 0
+    for run_result in results:
+        is_valid, validation_err_msg = adapted_validate_caching(run_result)
+        if not is_valid:
+            num_invalid_runs += 1
+            overall_correct_flag = False
+            if validation_err_msg:
+                if not first_error_message:
+                    first_error_message = (
+                        f"Validation failed: {validation_err_msg}"
+                    )
+                if validation_err_msg not in all_validation_errors_list:
+                    all_validation_errors_list.append(validation_err_msg)
+        else:
+            num_valid_runs += 1
+
+    metrics = aggregate_caching_metrics(results, results_dir)
+    metrics["execution_time_mean"] = float(np.mean(execution_times))
+    metrics["execution_time_std"] = float(np.std(execution_times))
+    metrics["num_valid_runs"] = num_valid_runs
+    metrics["num_invalid_runs"] = num_invalid_runs
+    metrics["all_validation_errors"] = all_validation_errors_list
+
+    save_json_results(
+        results_dir, metrics, overall_correct_flag, first_error_message
+    )
+    return metrics, overall_correct_flag, first_error_message
+
+
+def main(program_path: str, results_dir: str, num_workers: int = 1):
     """Runs the Caching evaluation using shinka.eval."""
     print(f"Evaluating program: {program_path}")
     print(f"Saving results to: {results_dir}")
-    os.makedirs(results_dir, exist_ok=True)
+    if not os.path.isdir(results_dir):
+        os.makedirs(results_dir, exist_ok=True)
 
     # Number of datasets to evaluate
     num_experiment_runs = len(TRACE_FILES)
@@ -127,15 +249,22 @@ def main(program_path: str, results_dir: str):
     ) -> Dict[str, Any]:
         return aggregate_caching_metrics(r, results_dir)
 
-    metrics, correct, error_msg = run_shinka_eval(
-        program_path=program_path,
-        results_dir=results_dir,
-        experiment_fn_name="run_caching",
-        num_runs=num_experiment_runs,
-        get_experiment_kwargs=get_caching_kwargs,
-        validate_fn=adapted_validate_caching,
-        aggregate_metrics_fn=_aggregator_with_context,
-    )
+    if num_workers > 1:
+        metrics, correct, error_msg = run_parallel_eval(
+            program_path, results_dir, num_workers
+        )
+    else:
+        from shinka.core import run_shinka_eval
+
+        metrics, correct, error_msg = run_shinka_eval(
+            program_path=program_path,
+            results_dir=results_dir,
+            experiment_fn_name="run_caching",
+            num_runs=num_experiment_runs,
+            get_experiment_kwargs=get_caching_kwargs,
+            validate_fn=adapted_validate_caching,
+            aggregate_metrics_fn=_aggregator_with_context,
+        )
 
     if correct:
         print("Evaluation and Validation completed successfully.")
@@ -166,5 +295,15 @@ if __name__ == "__main__":
         default="results",
         help="Dir to save results (metrics.json, correct.json)",
     )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=1,
+        help="Traces evaluated concurrently (1 = sequential)",
+    )
     parsed_args = parser.parse_args()
-    main(parsed_args.program_path, parsed_args.results_dir)
\ No newline at end of file
+    main(
+        parsed_args.program_path,
+        parsed_args.results_dir,
+        parsed_args.num_workers,
+    )
\ No newline at end of file
@@ -70,9 +70,13 @@ def run_caching(trace_path: str, copy_code_dst: str):
     trace = Trace(trace_path=trace_path)
     cache_capacity = max(int(trace.get_ndv() * 0.1), 1)
     cache = Cache(CacheConfig(cache_capacity))
-    for entry in trace.entries:
-        obj = CacheObj(key=str(entry.key))
-        cache.get(obj)
+    # Keep keys as ints end to end: hash(int) is trivial and unsalted, so
+    # per-access dict lookups are cheaper and runs reproduce across
+    # processes; no TraceEntry materialization is needed for the key column.
+    keys = trace.keys
+    get = cache.get
+    for key in keys:
+        get(CacheObj(key=key))
     with open(copy_code_dst, 'w') as f:
         f.write("")
     hit_rate = round(cache.hit_count / cache.access_count, 6)
@@ -17,47 +17,46 @@ assert os.path.exists(initial_py), "initial.py not found"
 
 job_config = LocalJobConfig(eval_program_path=evaluate_py, time="00:05:00")
 
-strategy = "weighted"
-if strategy == "uniform":
+# Parent-selection presets, looked up by name instead of an if/elif chain.
+PARENT_STRATEGIES = {
     # 1. Uniform from correct programs
-    parent_config = dict(
+    "uniform": dict(
         parent_selection_strategy="power_law",
         exploitation_alpha=0.0,
         exploitation_ratio=1.0,
-    )
-elif strategy == "hill_climbing":
+    ),
     # 2. Hill Climbing (Always from the Best)
-    parent_config = dict(
+    "hill_climbing": dict(
         parent_selection_strategy="power_law",
         exploitation_alpha=100.0,
         exploitation_ratio=1.0,
-    )
-elif strategy == "weighted":
+    ),
     # 3. Weighted Prioritization
-    parent_config = dict(
+    "weighted": dict(
         parent_selection_strategy="weighted",
         parent_selection_lambda=10.0,
-    )
-elif strategy == "power_law":
+    ),
     # 4. Power-Law Prioritization
-    parent_config = dict(
+    "power_law": dict(
         parent_selection_strategy="power_law",
         exploitation_alpha=1.0,
         exploitation_ratio=0.2,
-    )
-elif strategy == "power_law_high":
+    ),
     # 5. Power-Law Prioritization (High Alpha)
-    parent_config = dict(
+    "power_law_high": dict(
         parent_selection_strategy="power_law",
         exploitation_alpha=2.0,
         exploitation_ratio=0.2,
-    )
-elif strategy == "beam_search":
+    ),
     # 6. Beam Search
-    parent_config = dict(
+    "beam_search": dict(
         parent_selection_strategy="beam_search",
         num_beams=10,
-    )
+    ),
+}
+
+strategy = "weighted"
+parent_config = PARENT_STRATEGIES[strategy]
 
 
 db_config = DatabaseConfig(
